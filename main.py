@@ -3,18 +3,179 @@ Weihnachtsmann Routenplanung
 Berechnet die optimale Route unter Berücksichtigung von Kapazitäts- und Zeitbeschränkungen
 """
 
+import math
+
 import pandas as pd
 import numpy as np
 from geopy.distance import geodesic
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from pathlib import Path
 import os
 
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    # SciPy ist optional - ohne KD-Baum bleibt es beim linearen Scan
+    cKDTree = None
+
+try:
+    from numba import njit
+except ImportError:
+    # Numba ist optional - ohne JIT läuft der Greedy-Kernel als pures Python
+    def njit(*args, **kwargs):
+        def wrap(func):
+            return func
+        return wrap
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+@njit(cache=True, fastmath=True)
+def _haversine(lat1, lon1, lat2, lon2):
+    """Skalare Haversine-Distanz in km (Eingaben in Radiant)"""
+    a = (math.sin((lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2.0 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _two_opt_segment(seg, lats, lons, max_passes):
+    """
+    Verbessert eine Liefersequenz zwischen zwei Nordpol-Ankern per 2-opt
+
+    Kehrt Teilstücke um, solange sich die Tourlänge verkürzt, höchstens
+    max_passes Durchläufe. Die Endpunkte (Nordpol) bleiben fest.
+
+    Args:
+        seg: Zeilenindizes der Tour in Lieferreihenfolge
+        lats, lons: Koordinaten aller Kinder in Radiant
+        max_passes: Maximale Anzahl Verbesserungsdurchläufe
+
+    Returns:
+        Die umgeordneten Zeilenindizes
+    """
+    n = seg.shape[0]
+    if n < 3:
+        return seg
+
+    lat = np.empty(n + 2)
+    lon = np.empty(n + 2)
+    lat[0] = math.pi / 2
+    lon[0] = 0.0
+    lat[n + 1] = math.pi / 2
+    lon[n + 1] = 0.0
+    for i in range(n):
+        lat[i + 1] = lats[seg[i]]
+        lon[i + 1] = lons[seg[i]]
+
+    tour = np.arange(n + 2)
+    improved = True
+    passes = 0
+    while improved and passes < max_passes:
+        improved = False
+        passes += 1
+        for i in range(1, n):
+            for j in range(i + 1, n + 1):
+                a, b = tour[i - 1], tour[i]
+                c, e = tour[j], tour[j + 1]
+                d_old = (_haversine(lat[a], lon[a], lat[b], lon[b]) +
+                         _haversine(lat[c], lon[c], lat[e], lon[e]))
+                d_new = (_haversine(lat[a], lon[a], lat[c], lon[c]) +
+                         _haversine(lat[b], lon[b], lat[e], lon[e]))
+                if d_new + 1e-10 < d_old:
+                    tour[i:j + 1] = tour[i:j + 1][::-1]
+                    improved = True
+
+    result = np.empty(n, dtype=np.int64)
+    for i in range(n):
+        result[i] = seg[tour[i + 1] - 1]
+    return result
+
+
+@njit(cache=True, fastmath=True)
+def _greedy_trip(start_lat, start_lon, lats, lons, article_ids, unvisited, cargo,
+                 speed_kmh, stop_hours, time_budget_hours):
+    """
+    Liefert mit der aktuellen Ladung so lange aus, bis kein unbesuchtes
+    Kind mehr beliefert werden kann (Nearest Neighbor, eine Tour)
+
+    Bricht vorzeitig ab, sobald der nächste Stopp plus der Rückflug zum
+    Nordpol das verbleibende Zeitbudget überschreiten würde.
+
+    Args:
+        start_lat, start_lon: Startposition in Radiant
+        lats, lons: Koordinaten aller Kinder in Radiant
+        article_ids: Zugewiesene Artikel-IDs aller Kinder
+        unvisited: Boolesche Maske der unbesuchten Kinder (wird mutiert)
+        cargo: Ladungszähler pro Artikel-ID (wird mutiert)
+        speed_kmh: Fluggeschwindigkeit
+        stop_hours: Standzeit pro Stopp in Stunden
+        time_budget_hours: Verbleibendes Zeitbudget in Stunden
+
+    Returns:
+        Tuple (order, dists, time_exceeded): besuchte Zeilenindizes in
+        Reihenfolge, gefahrene Distanz je Stopp in Kilometern und ob
+        wegen des Zeitbudgets abgebrochen wurde
+    """
+    n = lats.shape[0]
+    order = np.empty(n, dtype=np.int64)
+    dists = np.empty(n, dtype=np.float64)
+    count = 0
+    cur_lat = start_lat
+    cur_lon = start_lon
+    elapsed = 0.0
+    time_exceeded = False
+
+    # Kandidaten einmal pro Tour vorfiltern: Ladung kann innerhalb einer
+    # Tour nur schrumpfen, also kommen keine neuen Kandidaten hinzu
+    candidates = np.empty(n, dtype=np.int64)
+    n_cand = 0
+    for i in range(n):
+        if unvisited[i] and cargo[article_ids[i]] > 0:
+            candidates[n_cand] = i
+            n_cand += 1
+
+    while True:
+        best = -1
+        best_d = 1e18
+        for j in range(n_cand):
+            i = candidates[j]
+            if unvisited[i] and cargo[article_ids[i]] > 0:
+                dx = _haversine(cur_lat, cur_lon, lats[i], lons[i])
+                if dx < best_d:
+                    best_d = dx
+                    best = i
+
+        if best < 0:
+            break
+
+        return_est = EARTH_RADIUS_KM * (math.pi / 2 - lats[best])
+        if (elapsed + best_d / speed_kmh + stop_hours +
+                return_est / speed_kmh > time_budget_hours):
+            time_exceeded = True
+            break
+
+        order[count] = best
+        dists[count] = best_d
+        count += 1
+        unvisited[best] = False
+        cargo[article_ids[best]] -= 1
+        elapsed += best_d / speed_kmh + stop_hours
+        cur_lat = lats[best]
+        cur_lon = lons[best]
+
+    return order[:count], dists[:count], time_exceeded
+
 
 class SantaRouteOptimizer:
     """Optimiert die Route des Weihnachtsmannes"""
-    
+
     NORTH_POLE = (90.0, 0.0)
     COAL_ARTICLE_ID = 0
+    # Ab dieser Kinderzahl lohnt sich der KD-Baum gegenüber dem linearen Scan
+    KDTREE_MIN_CHILDREN = 5000
+    TWO_OPT_MAX_PASSES = 10
     
     def __init__(self, children_file, gifts_file, sleigh_specs_file):
         """
@@ -34,15 +195,33 @@ class SantaRouteOptimizer:
         self.speed_kmh = self.sleigh_specs['speed (km/h)']
         self.time_per_stop_min = self.sleigh_specs['time per stop (min)']
         self.max_time_hours = 7
+        self._route_distances = None
+        self._ready_output_dirs = set()
         
     def _load_children(self, filepath):
         """Lädt Kinderdaten aus CSV"""
-        df = pd.read_csv(filepath, sep=';', decimal=',')
+        df = pd.read_csv(
+            filepath, sep=';', decimal=',',
+            usecols=['child', 'latitude', 'longitude', 'wish', 'naughty'],
+            dtype={'child': np.int32, 'latitude': np.float64, 'longitude': np.float64,
+                   'wish': np.int32, 'naughty': np.int8}
+        )
         return df
-    
+
     def _load_gifts(self, filepath):
-        """Lädt Geschenkdaten aus CSV"""
-        df = pd.read_csv(filepath, sep=';', decimal=',')
+        """Lädt Geschenkdaten aus CSV und baut den Artikel-Lookup auf"""
+        df = pd.read_csv(
+            filepath, sep=';', decimal=',',
+            usecols=['article', 'weight', 'volume'],
+            dtype={'article': np.int32, 'weight': np.float64, 'volume': np.float64}
+        )
+
+        gift_articles = df['article'].to_numpy(np.int64)
+        self.gift_weight = np.zeros(int(gift_articles.max()) + 1)
+        self.gift_volume = np.zeros_like(self.gift_weight)
+        self.gift_weight[gift_articles] = df['weight'].to_numpy()
+        self.gift_volume[gift_articles] = df['volume'].to_numpy()
+
         return df
     
     def _load_sleigh_specs(self, filepath):
@@ -55,31 +234,178 @@ class SantaRouteOptimizer:
     
     def assign_gifts(self):
         """Weist Kindern Geschenke zu - unartige Kinder bekommen Kohle (Artikel-ID 0)"""
-        self.children_df['assigned_article'] = self.children_df.apply(
-            lambda row: row['wish'] if row['naughty'] == 0 else self.COAL_ARTICLE_ID,
-            axis=1
+        self.children_df['assigned_article'] = np.where(
+            self.children_df['naughty'].to_numpy() == 0,
+            self.children_df['wish'].to_numpy(),
+            self.COAL_ARTICLE_ID
         )
         
-        self.children_df = self.children_df.merge(
-            self.gifts_df, 
-            left_on='assigned_article', 
-            right_on='article',
-            how='left'
-        )
+        assigned = self.children_df['assigned_article'].to_numpy(np.int64)
+        self.children_df['weight'] = self.gift_weight[assigned]
+        self.children_df['volume'] = self.gift_volume[assigned]
+
+        self._build_index()
+
+    def _build_index(self):
+        """Baut O(1)-Lookups (Kind-ID -> Zeilenindex) und Spalten-Arrays auf"""
+        self.child_ids = self.children_df['child'].to_numpy()
+        self.lat_arr = self.children_df['latitude'].to_numpy()
+        self.lon_arr = self.children_df['longitude'].to_numpy()
+        self.lats_rad = np.deg2rad(self.lat_arr)
+        self.lons_rad = np.deg2rad(self.lon_arr)
+        self.article_arr = self.children_df['assigned_article'].to_numpy(np.int64)
+        # float32-Kopien für den Greedy-Kernel: halbe Speicherbandbreite,
+        # bei km-Genauigkeit ohne Einfluss auf die Nachbarwahl
+        self.lats_rad32 = self.lats_rad.astype(np.float32)
+        self.lons_rad32 = self.lons_rad.astype(np.float32)
+        self.naughty_arr = self.children_df['naughty'].to_numpy()
+        self.weight_arr = self.children_df['weight'].to_numpy()
+        self.volume_arr = self.children_df['volume'].to_numpy()
+        self._row_of = dict(zip(self.child_ids.tolist(), range(len(self.child_ids))))
+
+        self._kdtree = None
+        if cKDTree is not None and len(self.child_ids) >= self.KDTREE_MIN_CHILDREN:
+            cos_lat = np.cos(self.lats_rad)
+            self._xyz = np.column_stack((cos_lat * np.cos(self.lons_rad),
+                                         cos_lat * np.sin(self.lons_rad),
+                                         np.sin(self.lats_rad)))
+            self._kdtree = cKDTree(self._xyz)
     
     def calculate_distance(self, coord1, coord2):
         """
-        Berechnet die Entfernung zwischen zwei Koordinaten in km
-        
+        Berechnet die Entfernung zwischen zwei Koordinaten in km (Haversine)
+
+        Args:
+            coord1: Tuple (latitude, longitude)
+            coord2: Tuple (latitude, longitude)
+
+        Returns:
+            Entfernung in Kilometern
+        """
+        lat1, lon1 = math.radians(coord1[0]), math.radians(coord1[1])
+        lat2, lon2 = math.radians(coord2[0]), math.radians(coord2[1])
+        a = (math.sin((lat2 - lat1) / 2) ** 2 +
+             math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+        return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+    def calculate_distance_accurate(self, coord1, coord2):
+        """
+        Berechnet die geodätische Entfernung (langsamer, aber genauer)
+
         Args:
             coord1: Tuple (latitude, longitude)
             coord2: Tuple (latitude, longitude)
-            
+
         Returns:
             Entfernung in Kilometern
         """
         return geodesic(coord1, coord2).kilometers
-    
+
+    def _haversine_vec(self, lat1, lon1, lats, lons):
+        """
+        Vektorisierte Haversine-Distanz von einem Punkt zu vielen Punkten
+
+        Args:
+            lat1, lon1: Aktuelle Position in Radiant
+            lats, lons: NumPy-Arrays der Zielkoordinaten in Radiant
+
+        Returns:
+            NumPy-Array der Entfernungen in Kilometern
+        """
+        dlat = lats - lat1
+        dlon = lons - lon1
+        a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lats) * np.sin(dlon / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+    def _greedy_trip_tree(self, start_lat, start_lon, unvisited, cargo, time_budget_hours):
+        """
+        Wie _greedy_trip, aber mit KD-Baum-Abfragen statt linearem Scan
+
+        Der Baum liegt über Einheitskugel-Koordinaten; die Sehnenlänge ist
+        monoton in der Großkreisdistanz, daher liefert die k-Nächste-Abfrage
+        exakt dieselben Nachbarn. Pro Schritt werden nur ~log N + k
+        Kandidaten angefasst statt aller N.
+
+        Args:
+            start_lat, start_lon: Startposition in Radiant
+            unvisited: Boolesche Maske der unbesuchten Kinder (wird mutiert)
+            cargo: Ladungszähler pro Artikel-ID (wird mutiert)
+            time_budget_hours: Verbleibendes Zeitbudget in Stunden
+
+        Returns:
+            Tuple (order, dists, time_exceeded) wie bei _greedy_trip
+        """
+        n = len(self.child_ids)
+        order = []
+        dists = []
+        elapsed = 0.0
+        time_exceeded = False
+        stop_hours = self.time_per_stop_min / 60.0
+        cur = np.array([math.cos(start_lat) * math.cos(start_lon),
+                        math.cos(start_lat) * math.sin(start_lon),
+                        math.sin(start_lat)])
+
+        while True:
+            best = -1
+            best_chord = 0.0
+            k = 16
+            while True:
+                chords, idxs = self._kdtree.query(cur, k=min(k, n))
+                for chord, idx in zip(np.atleast_1d(chords), np.atleast_1d(idxs)):
+                    if unvisited[idx] and cargo[self.article_arr[idx]] > 0:
+                        best = int(idx)
+                        best_chord = float(chord)
+                        break
+                if best >= 0 or k >= n:
+                    break
+                k *= 2
+
+            if best < 0:
+                break
+
+            distance = 2.0 * EARTH_RADIUS_KM * math.asin(min(best_chord, 2.0) / 2)
+            return_est = EARTH_RADIUS_KM * (math.pi / 2 - self.lats_rad[best])
+            if (elapsed + distance / self.speed_kmh + stop_hours +
+                    return_est / self.speed_kmh > time_budget_hours):
+                time_exceeded = True
+                break
+
+            order.append(best)
+            dists.append(distance)
+            unvisited[best] = False
+            cargo[self.article_arr[best]] -= 1
+            elapsed += distance / self.speed_kmh + stop_hours
+            cur = self._xyz[best]
+
+        return np.asarray(order, dtype=np.int64), np.asarray(dists), time_exceeded
+
+    def _improve_segments(self, segments):
+        """
+        Verbessert alle Liefersegmente per 2-opt, parallel über Threads
+
+        Die Segmente sind nach dem Greedy unabhängig voneinander; da
+        _two_opt_segment mit nogil=True kompiliert ist, geben die Worker
+        den GIL frei und die Verbesserung skaliert über die CPU-Kerne.
+
+        Args:
+            segments: Liste von Tupeln (articles_to_load, order)
+
+        Returns:
+            Liste mit denselben Ladungen und verbesserten Reihenfolgen
+        """
+        def improve(segment):
+            articles_to_load, order = segment
+            if len(order) > 2:
+                order = _two_opt_segment(order, self.lats_rad, self.lons_rad,
+                                         self.TWO_OPT_MAX_PASSES)
+            return articles_to_load, order
+
+        if len(segments) <= 1:
+            return [improve(segment) for segment in segments]
+
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            return list(executor.map(improve, segments))
+
     def optimize_route(self):
         """
         Optimiert die Route mit Greedy-Algorithmus (Nearest Neighbor)
@@ -89,76 +415,84 @@ class SantaRouteOptimizer:
             Liste von Dictionaries mit Stop-Informationen
         """
         self.assign_gifts()
-        
-        route = []
-        unvisited = set(self.children_df['child'].tolist())
-        current_position = self.NORTH_POLE
-        current_cargo = {}
-        total_time = 0
-        
-        while unvisited:
-            best_child = None
-            best_distance = float('inf')
-            
-            for child_id in unvisited:
-                child = self.children_df[self.children_df['child'] == child_id].iloc[0]
-                child_coords = (child['latitude'], child['longitude'])
-                article_id = int(child['assigned_article'])
-                
-                distance_to_child = self.calculate_distance(current_position, child_coords)
-                
-                can_deliver = article_id in current_cargo and current_cargo[article_id] > 0
-                
-                if can_deliver and distance_to_child < best_distance:
-                    best_distance = distance_to_child
-                    best_child = child_id
-            
-            if best_child is None:
-                undeliverable = []
-                for child_id in list(unvisited):
-                    child = self.children_df[self.children_df['child'] == child_id].iloc[0]
-                    
-                    if (child['weight'] > self.max_weight or 
-                        child['volume'] > self.max_volume):
-                        undeliverable.append(child_id)
-                        print(f"WARNUNG: Kind {child_id} kann nicht beliefert werden (Geschenk zu groß/schwer)")
-                
-                for child_id in undeliverable:
-                    unvisited.remove(child_id)
-                
-                if not unvisited:
-                    break
-                
-                return_distance = self.calculate_distance(current_position, self.NORTH_POLE)
-                total_time += return_distance / self.speed_kmh
-                
-                articles_to_load = self.calculate_loading(unvisited)
-                route.append({'type': 'refuel', 'articles': articles_to_load})
-                
-                current_position = self.NORTH_POLE
-                current_cargo = articles_to_load.copy()
+
+        unvisited = np.ones(len(self.child_ids), dtype=bool)
+        cargo = np.zeros(int(self.article_arr.max()) + 1, dtype=np.int64)
+        total_time = 0.0
+        segments = []
+
+        while unvisited.any():
+            undeliverable_mask = unvisited & ((self.weight_arr > self.max_weight) |
+                                              (self.volume_arr > self.max_volume))
+            for idx in np.flatnonzero(undeliverable_mask):
+                print(f"WARNUNG: Kind {self.child_ids[idx]} kann nicht beliefert werden (Geschenk zu groß/schwer)")
+            unvisited &= ~undeliverable_mask
+
+            if not unvisited.any():
+                break
+
+            articles_to_load = self.calculate_loading(unvisited)
+            cargo[:] = 0
+            for article_id, count in articles_to_load.items():
+                cargo[article_id] = count
+
+            if self._kdtree is not None:
+                order, dists, time_exceeded = self._greedy_trip_tree(
+                    math.pi / 2, 0.0, unvisited, cargo,
+                    self.max_time_hours - total_time
+                )
             else:
-                child = self.children_df[self.children_df['child'] == best_child].iloc[0]
-                child_coords = (child['latitude'], child['longitude'])
-                article_id = int(child['assigned_article'])
-                
-                route.append({'type': 'delivery', 'child_id': best_child})
-                unvisited.remove(best_child)
-                
-                current_cargo[article_id] -= 1
-                if current_cargo[article_id] == 0:
-                    del current_cargo[article_id]
-                
-                travel_distance = self.calculate_distance(current_position, child_coords)
-                current_position = child_coords
-                
-                total_time += travel_distance / self.speed_kmh
-                total_time += self.time_per_stop_min / 60.0
+                order, dists, time_exceeded = _greedy_trip(
+                    math.pi / 2, 0.0,
+                    self.lats_rad32, self.lons_rad32,
+                    self.article_arr, unvisited, cargo,
+                    self.speed_kmh, self.time_per_stop_min / 60.0,
+                    self.max_time_hours - total_time
+                )
+
+            segments.append((articles_to_load, order))
+            total_time += float(dists.sum()) / self.speed_kmh
+            total_time += len(order) * self.time_per_stop_min / 60.0
+            if len(order) > 0:
+                total_time += (EARTH_RADIUS_KM * (math.pi / 2 - self.lats_rad[order[-1]])
+                               / self.speed_kmh)
+
+            if time_exceeded:
+                print(f"WARNUNG: Zeitbudget erreicht - {int(unvisited.sum())} Kinder können nicht mehr beliefert werden")
+                break
+
+        segments = self._improve_segments(segments)
+
+        # Route aus den verbesserten Segmenten zusammensetzen
+        route = []
+        route_distances = []
+        total_time = 0.0
+        cur_lat = math.pi / 2
+
+        for articles_to_load, order in segments:
+            return_distance = EARTH_RADIUS_KM * (math.pi / 2 - cur_lat)
+            total_time += return_distance / self.speed_kmh
+            route.append({'type': 'refuel', 'articles': articles_to_load})
+            route_distances.append(return_distance)
+
+            if len(order) > 0:
+                prev_lats = np.concatenate(([math.pi / 2], self.lats_rad[order[:-1]]))
+                prev_lons = np.concatenate(([0.0], self.lons_rad[order[:-1]]))
+                dists = self._haversine_vec(prev_lats, prev_lons,
+                                            self.lats_rad[order], self.lons_rad[order])
+                for idx in order:
+                    route.append({'type': 'delivery', 'child_id': int(self.child_ids[idx])})
+                route_distances.extend(dists.tolist())
+                total_time += float(dists.sum()) / self.speed_kmh
+                total_time += len(order) * self.time_per_stop_min / 60.0
+                cur_lat = self.lats_rad[order[-1]]
         
-        final_return_distance = self.calculate_distance(current_position, self.NORTH_POLE)
+        final_return_distance = EARTH_RADIUS_KM * (math.pi / 2 - cur_lat)
         total_time += final_return_distance / self.speed_kmh
-        
+
         route.append({'type': 'refuel', 'articles': {}})
+        route_distances.append(final_return_distance)
+        self._route_distances = np.asarray(route_distances)
         
         if total_time > self.max_time_hours:
             print(f"WARNUNG: Gesamtzeit {total_time:.2f}h überschreitet das Limit von {self.max_time_hours}h!")
@@ -168,39 +502,36 @@ class SantaRouteOptimizer:
         
         return route
     
-    def calculate_loading(self, unvisited_children):
+    def calculate_loading(self, unvisited_mask):
         """
         Berechnet welche Geschenke beim Nachfüllen geladen werden sollen
         unter Berücksichtigung der Kapazitätsbeschränkungen
-        
+
         Args:
-            unvisited_children: Set der noch nicht besuchten Kind-IDs
-            
+            unvisited_mask: Boolesche Maske der noch nicht besuchten Kinder
+
         Returns:
             Dictionary {article_id: count}
         """
-        needed_articles = {}
-        for child_id in unvisited_children:
-            child = self.children_df[self.children_df['child'] == child_id].iloc[0]
-            article_id = int(child['assigned_article'])
-            needed_articles[article_id] = needed_articles.get(article_id, 0) + 1
-        
+        needed = np.bincount(self.article_arr[unvisited_mask],
+                             minlength=len(self.gift_weight))
+
         loaded_articles = {}
         current_weight = 0
         current_volume = 0
-        
-        for article_id, needed_count in sorted(needed_articles.items()):
-            gift = self.gifts_df[self.gifts_df['article'] == article_id].iloc[0]
-            
-            max_by_weight = int((self.max_weight - current_weight) / gift['weight'])
-            max_by_volume = int((self.max_volume - current_volume) / gift['volume'])
+
+        for article_id in np.nonzero(needed)[0]:
+            needed_count = int(needed[article_id])
+
+            max_by_weight = int((self.max_weight - current_weight) / self.gift_weight[article_id])
+            max_by_volume = int((self.max_volume - current_volume) / self.gift_volume[article_id])
             max_can_load = min(max_by_weight, max_by_volume, needed_count)
-            
+
             if max_can_load > 0:
-                loaded_articles[article_id] = max_can_load
-                current_weight += max_can_load * gift['weight']
-                current_volume += max_can_load * gift['volume']
-        
+                loaded_articles[int(article_id)] = max_can_load
+                current_weight += max_can_load * self.gift_weight[article_id]
+                current_volume += max_can_load * self.gift_volume[article_id]
+
         return loaded_articles
     
     def export_route(self, route, output_file):
@@ -212,73 +543,76 @@ class SantaRouteOptimizer:
             route: Liste von Stop-Dictionaries
             output_file: Pfad zur Ausgabedatei
         """
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
-        
-        rows = []
+        output_dir = Path(output_file).parent
+        if output_dir not in self._ready_output_dirs:
+            output_dir.mkdir(parents=True, exist_ok=True)
+            self._ready_output_dirs.add(output_dir)
+
+        stops = []
+        articles = []
+        pieces = []
         for stop in route:
             if stop['type'] == 'delivery':
-                rows.append({
-                    'stop': stop['child_id'],
-                    'article': '',
-                    'pieces': ''
-                })
+                stops.append(stop['child_id'])
+                articles.append('')
+                pieces.append('')
             elif stop['type'] == 'refuel':
                 if stop['articles']:
                     for article_id, count in sorted(stop['articles'].items()):
-                        rows.append({
-                            'stop': 0,
-                            'article': article_id,
-                            'pieces': count
-                        })
+                        stops.append(0)
+                        articles.append(article_id)
+                        pieces.append(count)
                 else:
-                    rows.append({
-                        'stop': 0,
-                        'article': '',
-                        'pieces': ''
-                    })
-        
-        route_df = pd.DataFrame(rows)
+                    stops.append(0)
+                    articles.append('')
+                    pieces.append('')
+
+        route_df = pd.DataFrame({'stop': stops, 'article': articles, 'pieces': pieces})
         route_df.to_csv(output_file, sep=';', decimal=',', index=False)
-        
+
         deliveries = sum(1 for s in route if s['type'] == 'delivery')
         refuels = sum(1 for s in route if s['type'] == 'refuel' and s['articles'])
-        
+
         print(f"Route gespeichert in: {output_file}")
-        print(f"Anzahl Zeilen: {len(rows)}")
+        print(f"Anzahl Zeilen: {len(stops)}")
         print(f"Anzahl Kinder beliefert: {deliveries}")
         print(f"Anzahl Nachfüllstops: {refuels}")
     
     def print_statistics(self, route):
         """Gibt detaillierte Statistiken zur Route aus"""
         print("\n=== ROUTENSTATISTIK ===")
-        
-        total_distance = 0
-        current_pos = self.NORTH_POLE
+
         nice_count = 0
         naughty_count = 0
         stop_count = 0
         refuel_count = 0
-        
+
         for stop in route:
             if stop['type'] == 'refuel':
-                distance = self.calculate_distance(current_pos, self.NORTH_POLE)
-                total_distance += distance
-                current_pos = self.NORTH_POLE
                 if stop['articles']:
                     refuel_count += 1
             else:
-                child_id = stop['child_id']
-                child = self.children_df[self.children_df['child'] == child_id].iloc[0]
-                child_coords = (child['latitude'], child['longitude'])
-                distance = self.calculate_distance(current_pos, child_coords)
-                total_distance += distance
-                current_pos = child_coords
                 stop_count += 1
-                
-                if child['naughty'] == 0:
+                if self.naughty_arr[self._row_of[stop['child_id']]] == 0:
                     nice_count += 1
                 else:
                     naughty_count += 1
+
+        if self._route_distances is not None and len(self._route_distances) == len(route):
+            total_distance = float(self._route_distances.sum())
+        else:
+            # Fallback für Routen, die nicht aus optimize_route stammen
+            total_distance = 0
+            current_pos = self.NORTH_POLE
+            for stop in route:
+                if stop['type'] == 'refuel':
+                    total_distance += self.calculate_distance(current_pos, self.NORTH_POLE)
+                    current_pos = self.NORTH_POLE
+                else:
+                    idx = self._row_of[stop['child_id']]
+                    child_coords = (self.lat_arr[idx], self.lon_arr[idx])
+                    total_distance += self.calculate_distance(current_pos, child_coords)
+                    current_pos = child_coords
         
         total_time = total_distance / self.speed_kmh
         total_time += stop_count * (self.time_per_stop_min / 60.0)